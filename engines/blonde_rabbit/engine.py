@@ -1,13 +1,37 @@
 import chess
 import chess.polyglot
+import torch
 from tools.common import EngineDescpriptor
+from engines.blonde_rabbit.src.model import BlondeRabbit, Config
 
 def getEngineDescriptor():
     return EngineDescpriptor("Blonde Rabbit", "1.0", "ogomi")
 
+MODEL = None
+
+def load_model(weights_path=None, compiled=True):
+    "Build the network once, optionally load weights and pay the torch.compile cost up front"
+    global MODEL
+    model = BlondeRabbit(Config())
+    if weights_path:
+        model.load_state_dict(torch.load(weights_path))
+    # inference only: eval mode here, torch.inference_mode around every call
+    # (channels_last would go here once the network has conv layers)
+    model.eval()
+    if compiled:
+        model.compile_layer()
+    MODEL = model
+
+def evaluate_batch(boards):
+    "Network scores for a list of boards, evaluated in a single forward pass"
+    if MODEL is None:
+        # no network loaded: neutral score
+        return [0] * len(boards)
+    with torch.inference_mode():
+        out = MODEL([b.board_fen() for b in boards])
+    # per-square outputs summed into one score per position
+    return out.flatten(1).sum(1).tolist()
+
 def evaluate(board: chess.Board):
     "Simple regression neural network evaluator, base on FEN"
-    fen = board.fen()
-    score = 0
-    # TODO: Call the network here
-    return score
\ No newline at end of file
+    return evaluate_batch([board])[0]
@@ -1,3 +1,6 @@
+from typing import List
+
+import numpy as np
 import torch
 
 class Config:
@@ -5,11 +8,21 @@ class Config:
     squares_height = 8
     squares_width = 8
     squares = 64
+    input_size = 13 # per square one-hot
+    output_size = 1
     piece_map = { # class 0 reserved for empty square
         'p': 1, 'n': 2, 'b': 3, 'r': 4, 'q': 5, 'k': 6,
         'P': 7, 'N': 8, 'B': 9, 'R': 10, 'Q': 11, 'K': 12
     }
 
+# ascii code -> class id, anything not a piece ('.' for empty) maps to 0
+PIECE_LUT = np.zeros(128, dtype=np.uint8)
+for _char, _piece_class in Config.piece_map.items():
+    PIECE_LUT[ord(_char)] = _piece_class
+
+# expands digit runs into '.' per empty square and drops rank separators
+FEN_EXPAND = str.maketrans({**{str(n): '.' * n for n in range(1, 9)}, '/': None})
+
 class BlondeRabbit(torch.nn.Module):
     '''
     each field represented by 12 classes (12 binary inputs as there is 6 white and 6 black pieces)
@@ -22,31 +35,37 @@ class BlondeRabbit(torch.nn.Module):
         super(BlondeRabbit, self).__init__()
         self.config = config
         self.layer = torch.nn.Linear(config.input_size, config.output_size)
+        self._compiled = None
 
     def fen_to_tensor(self, fen):
         '''
         Convert FEN string to tensor representation.
         example FEN: r1bqkbnr/p1pppppp/n7/1P6/8/8/1PPPPPPP/RNBQKBNR
         '''
-        tensor = torch.zeros((self.config.squares, self.config.input_classes))
-        fen_idx = 0
-        for h in range(self.config.squares_height):
-            for w in range(self.config.squares_width):
-                idx = h * self.config.squares_width + w
-                char = fen[fen_idx]  # considering '/' in FEN
-                fen_idx += 1
-                if char == "/":
-                    continue
-                elif char.isdigit():
-                    for empty_idx in range(int(char)):
-                        tensor[idx + empty_idx] = torch.zeros(self.config.input_classes)
-                    w += int(char) - 1  # adjust width index
-                else:
-                    piece_type = self.config.piece_map.get(char)
-                    if piece_type is not None:
-                        tensor[idx][piece_type] = 1
-        return tensor
-
-    def forward(self, x):
-        x = self.fen_to_tensor(x)
-        return self.layer(x)
\ No newline at end of file
+        return self.fens_to_tensor([fen])[0]
+
+    def fens_to_tensor(self, fens: List[str]):
+        '''
+        Convert a batch of FEN strings to a (B, 64, 13) tensor in one pass.
+        '''
+        placements = ''.join(fen.split(' ', 1)[0] for fen in fens).translate(FEN_EXPAND)
+        ids = np.frombuffer(placements.encode('ascii'), dtype=np.uint8).reshape(len(fens), self.config.squares)
+        classes = torch.from_numpy(PIECE_LUT[ids].astype(np.int64))
+        return torch.nn.functional.one_hot(classes, num_classes=self.config.input_classes).float()
+
+    def compile_layer(self, warmup_batch=1):
+        '''
+        torch.compile the layer and run it once on a dummy batch, so the
+        compile latency is paid at load time instead of on the first search.
+        '''
+        # bypass Module.__setattr__ so the wrapper is not registered as a submodule
+        # and state_dict() keeps its plain layer.* keys
+        object.__setattr__(self, "_compiled", torch.compile(self.layer, mode="reduce-overhead"))
+        dummy = torch.zeros((warmup_batch, self.config.squares, self.config.input_classes))
+        with torch.inference_mode():
+            self._compiled(dummy)
+
+    def forward(self, x: List[str]):
+        x = self.fens_to_tensor(x)
+        layer = self._compiled if self._compiled is not None else self.layer
+        return layer(x)
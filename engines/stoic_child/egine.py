@@ -7,39 +7,225 @@ from tools.common import EngineDescpriptor
 def getEngineDescriptor():
     return EngineDescpriptor("Stoic Child", "1.0", "ogomi")
 
-PIECE_VALUES = {
-    chess.PAWN: 100,
-    chess.KNIGHT: 320,
-    chess.BISHOP: 330,
-    chess.ROOK: 500,
-    chess.QUEEN: 900,
-    chess.KING: 20000
-}
+# indexed by chess.PieceType (chess.PAWN == 1), index 0 unused
+PIECE_VALUES = [0, 100, 320, 330, 500, 900, 20000]
 
 # optional simple piece-square tables (very small example)
-PST = {
-    chess.PAWN: [0]*64,
-    chess.KNIGHT: [0]*64,
-    chess.BISHOP: [0]*64,
-    chess.ROOK: [0]*64,
-    chess.QUEEN: [0]*64,
-    chess.KING: [0]*64
-}
+# one flat list, entry for piece type pt on square sq at PST_FLAT[pt*64 + sq]
+PST_FLAT = [0]*(7*64)
+
+# piece types whose PST has non-zero entries; the rest only contribute material
+PST_ACTIVE = [pt for pt in chess.PIECE_TYPES if any(PST_FLAT[pt*64:pt*64 + 64])]
+
+def material_white(board: chess.BaseBoard):
+    """Material + tiny PST from white's point of view."""
+    white = board.occupied_co[chess.WHITE]
+    black = board.occupied_co[chess.BLACK]
+    pawn, knight, bishop, rook, queen = PIECE_VALUES[chess.PAWN:chess.KING]
+    # material as a fixed dot product of popcounts; kings always cancel out
+    score = (pawn * ((board.pawns & white).bit_count() - (board.pawns & black).bit_count())
+             + knight * ((board.knights & white).bit_count() - (board.knights & black).bit_count())
+             + bishop * ((board.bishops & white).bit_count() - (board.bishops & black).bit_count())
+             + rook * ((board.rooks & white).bit_count() - (board.rooks & black).bit_count())
+             + queen * ((board.queens & white).bit_count() - (board.queens & black).bit_count()))
+    # pst, visiting only occupied squares
+    for pt in PST_ACTIVE:
+        base = pt*64
+        for sq in chess.scan_forward(board.pieces_mask(pt, chess.WHITE)):
+            score += PST_FLAT[base + sq]
+        for sq in chess.scan_forward(board.pieces_mask(pt, chess.BLACK)):
+            score -= PST_FLAT[base + sq]
+    return score
+
+# print every evaluated position; stripped entirely under python -O
+DEBUG_EVAL = False
 
 def evaluate(board: chess.Board):
-    """Material + tiny PST. Positive means advantage for side to move."""
-    score = 0
-    print(f"Board in fen: {board.fen()}")
-    # material and pst
-    for sq in chess.SQUARES:
-        piece = board.piece_at(sq)
-        if piece:
-            val = PIECE_VALUES[piece.piece_type]
-            # add PST (flip for black)
-            pst_val = PST[piece.piece_type][sq]
-            if piece.color == chess.WHITE:
-                score += val + pst_val
-            else:
-                score -= val + pst_val
+    """Material + tiny PST. Positive means advantage for side to move.
+    Hot path (once per searched leaf): keep I/O and string building out of it.
+    """
+    if __debug__ and DEBUG_EVAL:
+        print(f"Board in fen: {board.fen()}")
+    score = material_white(board)
     # perspective relative to side to move
     return score if board.turn == chess.WHITE else -score
+
+# polyglot zobrist keys, piece key for (pt, color, sq) at 64*(2*pt - 2 + color) + sq
+ZOBRIST = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+ZOBRIST_TURN = ZOBRIST[780]
+_zobrist_hasher = chess.polyglot.ZobristHasher(ZOBRIST)
+
+def _ep_key(board: chess.Board):
+    return _zobrist_hasher.hash_ep_square(board) if board.ep_square is not None else 0
+
+class EvalBoard(chess.Board):
+    """
+    chess.Board keeping `score_white` (same value as material_white) and
+    `zobrist_key` (same value as chess.polyglot.zobrist_hash) up to date
+    on push/pop, so the search can read both in O(1).
+    Anything that rewrites the whole position through the Board API recomputes
+    them from scratch; assigning turn/castling_rights/ep_square directly does not.
+    """
+
+    def __init__(self, fen=chess.STARTING_FEN, *, chess960=False):
+        self.score_white = 0
+        self.zobrist_key = 0
+        self._castling_key = 0  # castling part of zobrist_key
+        self._undo_stack = []
+        self._initialized = False  # chess.Board state is not there yet while BaseBoard sets up
+        super().__init__(fen, chess960=chess960)
+        self._initialized = True
+        self._refresh()
+
+    def _move_delta(self, move: chess.Move):
+        """
+        Change of score_white and xor of piece keys caused by `move`,
+        computed before it is pushed.
+        """
+        if not move:
+            return 0, 0
+        us = self.turn
+        sign = 1 if us == chess.WHITE else -1
+        from_sq = move.from_square
+        to_sq = move.to_square
+        piece_type = self.piece_type_at(from_sq)
+        if piece_type is None:
+            return 0, 0
+        us_base = 64*(us - 2)  # + 128*pt gives the zobrist piece block for our side
+
+        # castling and en passant tested inline from the piece type we already
+        # have, instead of the generic is_castling/is_en_passant calls
+        if piece_type == chess.KING and (abs((from_sq & 7) - (to_sq & 7)) > 1
+                                         or self.rooks & self.occupied_co[us] & chess.BB_SQUARES[to_sq]):
+            # material unchanged, only king and rook squares move
+            kingside = self.is_kingside_castling(move)
+            rank = 0 if us == chess.WHITE else 7
+            king_to = chess.square(6 if kingside else 2, rank)
+            rook_to = chess.square(5 if kingside else 3, rank)
+            if self.rooks & self.occupied_co[us] & chess.BB_SQUARES[to_sq]:
+                rook_from = to_sq  # king-takes-rook encoding
+            else:
+                rook_from = chess.square(7 if kingside else 0, rank)
+            king_base = chess.KING*64
+            rook_base = chess.ROOK*64
+            delta = (PST_FLAT[king_base + king_to] - PST_FLAT[king_base + from_sq]
+                     + PST_FLAT[rook_base + rook_to] - PST_FLAT[rook_base + rook_from])
+            king_z = us_base + 128*chess.KING
+            rook_z = us_base + 128*chess.ROOK
+            key = (ZOBRIST[king_z + from_sq] ^ ZOBRIST[king_z + king_to]
+                   ^ ZOBRIST[rook_z + rook_from] ^ ZOBRIST[rook_z + rook_to])
+            return sign * delta, key
+
+        delta = -PST_FLAT[piece_type*64 + from_sq]
+        # promotions swap the pawn's value for the new piece's
+        new_type = move.promotion or piece_type
+        delta += PIECE_VALUES[new_type] - PIECE_VALUES[piece_type] + PST_FLAT[new_type*64 + to_sq]
+        key = ZOBRIST[us_base + 128*piece_type + from_sq] ^ ZOBRIST[us_base + 128*new_type + to_sq]
+
+        them_base = 64*(1 - us - 2)
+        if piece_type == chess.PAWN and to_sq == self.ep_square and not self.occupied & chess.BB_SQUARES[to_sq]:
+            capture_sq = to_sq - 8 if us == chess.WHITE else to_sq + 8
+            delta += PIECE_VALUES[chess.PAWN] + PST_FLAT[chess.PAWN*64 + capture_sq]
+            key ^= ZOBRIST[them_base + 128*chess.PAWN + capture_sq]
+        else:
+            captured = self.piece_type_at(to_sq)
+            if captured:
+                delta += PIECE_VALUES[captured] + PST_FLAT[captured*64 + to_sq]
+                key ^= ZOBRIST[them_base + 128*captured + to_sq]
+        return sign * delta, key
+
+    def push(self, move: chess.Move):
+        delta, key = self._move_delta(move)
+        self._undo_stack.append((self.score_white, self.zobrist_key, self._castling_key))
+        castling_rights = self.castling_rights
+        key ^= _ep_key(self)
+        super().push(move)
+        key ^= _ep_key(self)
+        if self.castling_rights != castling_rights:
+            castling_key = _zobrist_hasher.hash_castling(self)
+            key ^= self._castling_key ^ castling_key
+            self._castling_key = castling_key
+        self.score_white += delta
+        self.zobrist_key ^= key ^ ZOBRIST_TURN
+
+    def pop(self):
+        move = super().pop()
+        self.score_white, self.zobrist_key, self._castling_key = self._undo_stack.pop()
+        return move
+
+    def clear_stack(self):
+        super().clear_stack()
+        self._undo_stack = []
+
+    def copy(self, *, stack=True):
+        board = super().copy(stack=stack)
+        board.score_white = self.score_white
+        board.zobrist_key = self.zobrist_key
+        board._castling_key = self._castling_key
+        if stack:
+            stack = len(self._undo_stack) if stack is True else stack
+            board._undo_stack = self._undo_stack[-stack:]
+        return board
+
+    def _refresh(self):
+        if not self._initialized:
+            return
+        self.score_white = material_white(self)
+        self.zobrist_key = _zobrist_hasher(self)
+        self._castling_key = _zobrist_hasher.hash_castling(self)
+
+    # whole-position setters: recompute instead of tracking deltas
+    def _reset_board(self):
+        super()._reset_board()
+        self._refresh()
+
+    def _clear_board(self):
+        super()._clear_board()
+        self._refresh()
+
+    def _set_board_fen(self, fen):
+        super()._set_board_fen(fen)
+        self._refresh()
+
+    def _set_piece_map(self, pieces):
+        super()._set_piece_map(pieces)
+        self._refresh()
+
+    def _set_chess960_pos(self, scharnagl):
+        super()._set_chess960_pos(scharnagl)
+        self._refresh()
+
+    def set_fen(self, fen):
+        super().set_fen(fen)
+        self._refresh()
+
+    def set_castling_fen(self, castling_fen):
+        super().set_castling_fen(castling_fen)
+        self._refresh()
+
+    def set_chess960_pos(self, scharnagl):
+        super().set_chess960_pos(scharnagl)
+        self._refresh()
+
+    def set_piece_at(self, square, piece, promoted=False):
+        super().set_piece_at(square, piece, promoted)
+        self._refresh()
+
+    def remove_piece_at(self, square):
+        piece = super().remove_piece_at(square)
+        self._refresh()
+        return piece
+
+    def apply_transform(self, f):
+        super().apply_transform(f)
+        self._refresh()
+
+    def apply_mirror(self):
+        super().apply_mirror()
+        self._refresh()
+
+    def root(self):
+        # chess.Board.root restores the first stack state straight into a new board
+        board = super().root()
+        board._refresh()
+        return board
@@ -1,92 +1,335 @@
 #!/usr/bin/env python3
 """
 Minimal UCI engine using python-chess
-- negamax with alpha-beta
+- negamax with alpha-beta (principal variation search)
 - iterative deepening (simple)
-- transposition table (basic)
+- transposition table (fixed size, depth-preferred + always-replace)
+- quiescence search over captures and promotions
+- lazy SMP: helper processes sharing the transposition table
+- syzygy WDL probing (SyzygyPath option)
 - simple material + piece square table evaluation
 """
 
 import sys
 import time
 import threading
+import multiprocessing
+import struct
 import chess
-import chess.polyglot
+import chess.syzygy
+import os
 import random
+from multiprocessing import shared_memory
+from operator import itemgetter
 
-from engines.stoic_child.egine import evaluate, getEngineDescriptor
+from engines.stoic_child.egine import EvalBoard, getEngineDescriptor
 
 # ---- Transposition table entry types ----
 EXACT = 0
 ALPHA = 1
 BETA = 2
 
-class TTEntry:
-    def __init__(self, depth, score, flag, move):
-        self.depth = depth
-        self.score = score
-        self.flag = flag
-        self.best_move = move
-
-transposition_table = {}
-
-
-def get_tt_key(board):
-    """Return a transposition key for `board`.
-    Works with a `chess.Board` or wrapper objects that expose a `.chessboard` attribute.
-    Falls back to `chess.polyglot.zobrist_hash` or a simple fen-based hash.
+# ---- Transposition table ----
+# Fixed size, two entries per bucket: a depth-preferred one and an always-replace
+# one. Entries are packed (key, depth, score, flag, move) records in shared
+# memory, so lazy SMP helper processes read and write the same table. Writes are
+# not locked: a torn entry only costs a bad move-ordering hint or a wrong score,
+# the usual lazy SMP trade-off.
+TT_ENTRY = struct.Struct("<QBiBH")  # 16 bytes, move packed as from | to << 6 | promotion << 12
+TT_BUCKET_BYTES = 2 * TT_ENTRY.size
+DEFAULT_HASH_MB = 16
+
+tt_shm = None
+tt_buf = None
+tt_size = 0
+tt_mask = 0
+
+SHM_DIR = "/dev/shm"  # tmpfs backing SharedMemory on linux
+
+def tt_resize(hash_mb):
+    """Reallocate the table to fit in `hash_mb` megabytes (drops all entries).
+    The size is capped to the free space of SHM_DIR, where touching pages past
+    it would SIGBUS. Returns False and keeps the old table if allocation fails.
     """
-    # direct method if available
-    if hasattr(board, "transposition_key") and callable(getattr(board, "transposition_key")):
-        return board.transposition_key()
-    # wrapped board (jcchess.Board) stores python-chess board at .chessboard
-    underlying = getattr(board, "chessboard", None)
-    if underlying is not None:
-        if hasattr(underlying, "transposition_key") and callable(getattr(underlying, "transposition_key")):
-            return underlying.transposition_key()
-        try:
-            return chess.polyglot.zobrist_hash(underlying)
-        except Exception:
-            return hash(underlying.fen())
-    # fallback for plain python-chess Board
+    global tt_shm, tt_buf, tt_size, tt_mask
+    buckets = max(1, hash_mb * 1024 * 1024 // TT_BUCKET_BYTES)
+    if os.path.isdir(SHM_DIR):
+        stat = os.statvfs(SHM_DIR)
+        available = stat.f_bavail * stat.f_frsize
+        if tt_shm is not None:
+            available += tt_size * TT_BUCKET_BYTES  # freed once the old table goes
+        buckets = max(1, min(buckets, available // 2 // TT_BUCKET_BYTES))  # leave headroom
+    size = 1 << (buckets.bit_length() - 1)  # round down to a power of two
     try:
-        return chess.polyglot.zobrist_hash(board)
-    except Exception:
-        return hash(board.fen())
+        # a fresh segment is zero-filled, i.e. already an empty table
+        shm = shared_memory.SharedMemory(create=True, size=size * TT_BUCKET_BYTES)
+    except OSError:
+        return False
+    tt_release()
+    tt_shm = shm
+    tt_buf = shm.buf
+    tt_size = size
+    tt_mask = size - 1
+    return True
+
+def tt_attach(name, size):
+    """Map a table created by another process (lazy SMP helpers)."""
+    global tt_shm, tt_buf, tt_size, tt_mask
+    tt_shm = shared_memory.SharedMemory(name=name)
+    tt_buf = tt_shm.buf
+    tt_size = size
+    tt_mask = size - 1
+
+def tt_release(unlink=True):
+    global tt_shm, tt_buf
+    if tt_shm is None:
+        return
+    tt_buf = None
+    tt_shm.close()
+    if unlink:
+        tt_shm.unlink()
+    tt_shm = None
+
+def tt_clear():
+    zeros = bytes(1024 * 1024)
+    total = tt_size * TT_BUCKET_BYTES
+    for offset in range(0, total, len(zeros)):
+        chunk = min(len(zeros), total - offset)
+        tt_buf[offset:offset + chunk] = zeros[:chunk]
+
+def tt_probe(key):
+    offset = (key & tt_mask) * TT_BUCKET_BYTES
+    entry = TT_ENTRY.unpack_from(tt_buf, offset)
+    if entry[0] == key:
+        return entry
+    entry = TT_ENTRY.unpack_from(tt_buf, offset + TT_ENTRY.size)
+    if entry[0] == key:
+        return entry
+    return None
+
+def tt_store(key, depth, score, flag, move):
+    offset = (key & tt_mask) * TT_BUCKET_BYTES
+    packed = move.from_square | move.to_square << 6 | (move.promotion or 0) << 12 if move else 0
+    # tt_buf[offset + 8] is the depth byte of the depth-preferred entry
+    if depth < tt_buf[offset + 8]:
+        offset += TT_ENTRY.size
+    TT_ENTRY.pack_into(tt_buf, offset, key, depth, score, flag, packed)
+
+def tt_unpack_move(packed):
+    """Unpack the move field of a table entry (None if empty)."""
+    if not packed:
+        return None
+    return chess.Move(packed & 63, packed >> 6 & 63, packed >> 12 or None)
+
+def get_tt_key(board: EvalBoard):
+    """Return a transposition key for `board`.
+    EvalBoard keeps its polyglot zobrist hash up to date on push/pop.
+    """
+    return board.zobrist_key
+
+# ---- Move ordering ----
+# MVV-LVA piece values, indexed by chess.PieceType
+VICTIM = [0, 100, 320, 330, 500, 900, 20000]
+TT_ORDER = 2000000  # tt move, then captures, then killers, then other quiets
+CAPTURE_ORDER = 1000000
+KILLER_ORDER = 500000
+MAX_PLY = 64
+
+# two quiet moves per ply that caused a beta cutoff
+killers = [[None, None] for _ in range(MAX_PLY)]
+# quiet cutoff counts per [piece index][to square], piece index = type (+6 for black)
+history = [[0] * 64 for _ in range(13)]
+
+def score_moves(board, moves, tt_move=None, killer_moves=()):
+    """Return (key, move) pairs sorted best first, each key computed once.
+    Runs for every node, so cheap int tests come before python-chess calls
+    and Move.__eq__ is only reached when the squares already match.
+    """
+    piece_type_at = board.piece_type_at
+    bb_squares = chess.BB_SQUARES
+    them = board.occupied_co[not board.turn]
+    offset = 0 if board.turn == chess.WHITE else 6
+    tt_to = tt_move.to_square if tt_move else -1
+    killer_squares = {(k.from_square, k.to_square) for k in killer_moves if k}
+    scored = []
+    for mv in moves:
+        to_sq = mv.to_square
+        if to_sq == tt_to and mv == tt_move:
+            key = TT_ORDER
+        elif them & bb_squares[to_sq]:
+            key = CAPTURE_ORDER + VICTIM[piece_type_at(to_sq)] * 16 - VICTIM[piece_type_at(mv.from_square)]
+        elif killer_squares and (mv.from_square, to_sq) in killer_squares:
+            key = KILLER_ORDER
+        else:
+            key = history[offset + piece_type_at(mv.from_square)][to_sq]
+        scored.append((key, mv))
+    scored.sort(key=itemgetter(0), reverse=True)
+    return scored
 
 # ---- Search ----
+MATE = 1000000  # mate scores are MATE - ply, far above any material sum
+MATE_BOUND = MATE - 1000
+
+def score_to_tt(score, ply):
+    """Mate scores are stored relative to the node, not the root."""
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+def score_from_tt(score, ply):
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+NULL_MOVE_R = 2
+ENDGAME_MATERIAL = 1300  # non-pawn material (both sides) at or below this counts as endgame
+
+def in_endgame(board: chess.Board):
+    """Low non-pawn material, where zugzwang makes null-move pruning unsafe."""
+    if not board.occupied_co[board.turn] & ~(board.pawns | board.kings):
+        return True
+    material = 0
+    for pt in (chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN):
+        material += VICTIM[pt] * (board.pieces_mask(pt, chess.WHITE) | board.pieces_mask(pt, chess.BLACK)).bit_count()
+    return material <= ENDGAME_MATERIAL
+
+# ---- Endgame tablebases ----
+TB_WIN = 900000  # tablebase wins rank below mates but above any material
+tablebase = None
+tablebase_path = ""
+tablebase_pieces = 0
+
+def open_syzygy(path):
+    """Open the syzygy tables under `path` (UCI style, os.pathsep separated), once."""
+    global tablebase, tablebase_path, tablebase_pieces
+    if tablebase is not None:
+        tablebase.close()
+    tablebase = None
+    tablebase_path = ""
+    tablebase_pieces = 0
+    directories = [d for d in path.split(os.pathsep) if d and d != "<empty>"]
+    if not directories:
+        return
+    tb = chess.syzygy.Tablebase()
+    try:
+        for directory in directories:
+            tb.add_directory(directory, load_dtz=False)
+    except OSError:
+        tb.close()
+        return
+    if not tb.wdl:
+        tb.close()
+        return
+    tablebase = tb
+    tablebase_path = path
+    tablebase_pieces = max(len(name) - 1 for name in tb.wdl)  # e.g. "KRvK" is 3 pieces
+
 nodes = 0
 stop_search = False
 best_move_global = None
 
-def negamax(board: chess.Board, depth, alpha, beta):
-    global nodes, transposition_table
+def static_eval(board: EvalBoard):
+    """Incrementally maintained material, relative to side to move."""
+    return board.score_white if board.turn == chess.WHITE else -board.score_white
+
+def quiescence(board: EvalBoard, alpha, beta):
+    """Search captures and promotions only, until the position is quiet."""
+    global nodes
     nodes += 1
 
+    stand_pat = static_eval(board)
+    if stand_pat >= beta:
+        return beta
+    alpha = max(alpha, stand_pat)
+
+    moves = board.generate_legal_captures()
+    # quiet queen promotions change material as much as a capture
+    seventh = chess.BB_RANK_7 if board.turn == chess.WHITE else chess.BB_RANK_2
+    promoting = board.pawns & board.occupied_co[board.turn] & seventh
+    if promoting:
+        empty = chess.BB_ALL & ~board.occupied
+        promotions = [mv for mv in board.generate_legal_moves(promoting, empty) if mv.promotion == chess.QUEEN]
+        moves = [*moves, *promotions]
+
+    for _, mv in score_moves(board, moves):
+        board.push(mv)
+        score = -quiescence(board, -beta, -alpha)
+        board.pop()
+        if score >= beta:
+            return beta
+        alpha = max(alpha, score)
+    return alpha
+
+def negamax(board: EvalBoard, depth, alpha, beta, ply):
+    global nodes
+    nodes += 1
+    if helper_generation is not None:
+        poll_helper_abort()
+    alpha_orig = alpha
+
     key = get_tt_key(board)
-    if key in transposition_table:
-        entry = transposition_table[key]
-        if entry.depth >= depth:
-            if entry.flag == EXACT:
-                return entry.score
-            elif entry.flag == ALPHA and entry.score <= alpha:
-                return alpha
-            elif entry.flag == BETA and entry.score >= beta:
-                return beta
-
-    if depth == 0 or board.is_game_over():
-        return evaluate(board)
+    tt_move = None
+    entry = tt_probe(key)
+    if entry is not None:
+        _, entry_depth, entry_score, entry_flag, packed_move = entry
+        entry_score = score_from_tt(entry_score, ply)
+        if entry_depth >= depth:
+            if entry_flag == EXACT:
+                return entry_score
+            elif entry_flag == ALPHA and entry_score <= alpha:
+                return entry_score
+            elif entry_flag == BETA and entry_score >= beta:
+                return entry_score
+        tt_move = tt_unpack_move(packed_move)
+
+    # WDL probe right after captures and pawn moves, which is what the tables assume
+    if (tablebase is not None and ply > 0 and board.halfmove_clock == 0
+            and not board.castling_rights and board.occupied.bit_count() <= tablebase_pieces):
+        wdl = tablebase.get_wdl(board)
+        if wdl is not None:
+            if wdl > 1:
+                return TB_WIN - ply
+            if wdl < -1:
+                return -TB_WIN + ply
+            return 0  # draw, or a win/loss spoiled by the 50-move rule
+
+    if depth == 0:
+        return quiescence(board, alpha, beta)
+    # null-move pruning: if passing still fails high, the real moves will too
+    if (depth >= 3 and board.move_stack and board.move_stack[-1]
+            and not board.is_check() and not in_endgame(board)):
+        board.push(chess.Move.null())
+        score = -negamax(board, depth-1-NULL_MOVE_R, -beta, -beta+1, ply+1)
+        board.pop()
+        if score >= beta:
+            return beta
 
     max_score = -9999999
     best_local = None
 
-    # move ordering: try captures first (simple)
-    moves = list(board.legal_moves)
-    moves.sort(key=lambda m: board.is_capture(m), reverse=True)
-
-    for mv in moves:
+    # move ordering: tt move first, then MVV-LVA captures, then killers
+    killer_moves = killers[ply]
+    scored = score_moves(board, board.generate_legal_moves(), tt_move, killer_moves)
+    # cheap terminal checks instead of board.is_game_over(); mate beats the 50-move rule
+    if not scored:
+        return -MATE + ply if board.is_check() else 0
+    if board.halfmove_clock >= 100:
+        return 0
+
+    # principal variation search: full window for the first move, null
+    # window for the rest, re-searching only when a move beats alpha
+    for i, (_, mv) in enumerate(scored):
         board.push(mv)
-        score = -negamax(board, depth-1, -beta, -alpha)
+        if i == 0:
+            score = -negamax(board, depth-1, -beta, -alpha, ply+1)
+        else:
+            score = -negamax(board, depth-1, -alpha-1, -alpha, ply+1)
+            if alpha < score < beta:
+                score = -negamax(board, depth-1, -beta, -score, ply+1)
         board.pop()
 
         if score > max_score:
@@ -94,25 +337,45 @@ def negamax(board: chess.Board, depth, alpha, beta):
             best_local = mv
         alpha = max(alpha, score)
         if alpha >= beta:
+            if not board.piece_type_at(mv.to_square):
+                if mv != killer_moves[0]:
+                    killer_moves[1] = killer_moves[0]
+                    killer_moves[0] = mv
+                piece_idx = board.piece_type_at(mv.from_square) + (6 if board.turn == chess.BLACK else 0)
+                history[piece_idx][mv.to_square] += depth * depth
             break
 
-    # store in TT
+    # store in TT, bounds judged against the window we were called with
     flag = EXACT
-    if max_score <= alpha: # careful: alpha already changed; this is a small heuristic
+    if max_score <= alpha_orig: # fail low: upper bound
         flag = ALPHA
-    elif max_score >= beta:
+    elif max_score >= beta: # fail high: lower bound
         flag = BETA
 
-    transposition_table[key] = TTEntry(depth, max_score, flag, best_local)
+    tt_store(key, depth, score_to_tt(max_score, ply), flag, best_local)
     return max_score
 
-def search_root(board: chess.Board, max_depth, time_limit=None):
+INFO_INTERVAL = 0.1  # seconds between info lines sent to the GUI
+
+def search_root(board: EvalBoard, max_depth, time_limit=None):
     """Iterative deepening to max_depth. Returns best move found."""
     global stop_search, best_move_global, nodes
     best = None
     start_time = time.time()
+    last_info_time = start_time
+    pending_info = None
     nodes = 0
     stop_search = False
+    # age history so earlier searches do not dominate quiet ordering
+    for row in history:
+        row[:] = [h // 2 for h in row]
+
+    # root moves ordered once (MVV-LVA), then by the previous iteration's scores
+    moves = [mv for _, mv in score_moves(board, board.generate_legal_moves())]
+    if not moves:
+        # checkmated or stalemated: nothing to search, and nothing to store
+        sys.stdout.write(f"info depth 0 score {'mate 0' if board.is_check() else 'cp 0'}\n")
+        return None
 
     for d in range(1, max_depth+1):
         if stop_search:
@@ -120,21 +383,21 @@ def search_root(board: chess.Board, max_depth, time_limit=None):
         best_score = -9999999
         alpha = -10000000
         beta = 10000000
-        # simple move ordering: try tt move first if available
+        # try tt move first if available, a single swap keeps the rest in order
         key = get_tt_key(board)
-        tt_move = transposition_table.get(key).best_move if (key in transposition_table) else None
-
-        moves = list(board.legal_moves)
+        entry = tt_probe(key)
+        tt_move = tt_unpack_move(entry[4]) if entry is not None else None
         if tt_move and tt_move in moves:
-            moves.remove(tt_move)
-            moves.insert(0, tt_move)
-        moves.sort(key=lambda m: board.is_capture(m), reverse=True)
+            idx = moves.index(tt_move)
+            moves[0], moves[idx] = moves[idx], moves[0]
 
+        scored = []
         for mv in moves:
             if stop_search: break
             board.push(mv)
-            score = -negamax(board, d-1, -beta, -alpha)
+            score = -negamax(board, d-1, -beta, -alpha, 1)
             board.pop()
+            scored.append((score, mv))
             if score > best_score:
                 best_score = score
                 best = mv
@@ -145,28 +408,146 @@ def search_root(board: chess.Board, max_depth, time_limit=None):
                 break
 
         best_move_global = best
-        # a small info print for GUIs (depth/nodes)
-        print(f"info depth {d} nodes {nodes} score cp {best_score}")
-        sys.stdout.flush()
+        if len(scored) == len(moves):
+            scored.sort(key=itemgetter(0), reverse=True)
+            moves = [mv for _, mv in scored]
+            # every root move got a full window, so the result is exact; storing
+            # it keeps a stale entry from an earlier search off the front
+            tt_store(key, d, score_to_tt(best_score, 0), EXACT, best)
+        # a small info line for GUIs (depth/nodes), throttled to INFO_INTERVAL
+        if MATE_BOUND < abs(best_score) <= MATE:
+            mate_in = (MATE - abs(best_score) + 1) // 2
+            score_str = f"mate {mate_in if best_score > 0 else -mate_in}"
+        else:
+            score_str = f"cp {best_score}"
+        pending_info = f"info depth {d} nodes {nodes} score {score_str}\n"
+        now = time.time()
+        if now - last_info_time > INFO_INTERVAL:
+            sys.stdout.write(pending_info)
+            sys.stdout.flush()
+            pending_info = None
+            last_info_time = now
 
-        if time_limit and (time.time() - start_time) > time_limit:
+        if time_limit and (now - start_time) > time_limit:
             break
 
+    # the deepest result always reaches the GUI, just before bestmove
+    if pending_info:
+        sys.stdout.write(pending_info)
     return best
 
+# ---- Lazy SMP ----
+# Helper processes search the same root as the main thread and only share
+# results through the transposition table; their shuffled root orders fill it
+# with entries the main search then gets for free.
+INFINITY = 10000000
+
+helpers = []
+helper_queues = []
+search_generation = None  # shared counter, helpers drop a job once it moves on
+
+# set only inside helper processes: the shared counter and the job being searched
+HELPER_POLL_NODES = 1024
+helper_generation = None
+helper_job = 0
+helper_poll = HELPER_POLL_NODES
+
+class SearchAborted(Exception):
+    pass
+
+def poll_helper_abort():
+    """Every HELPER_POLL_NODES nodes, abandon the helper search once its job is stale."""
+    global helper_poll
+    helper_poll -= 1
+    if helper_poll <= 0:
+        helper_poll = HELPER_POLL_NODES
+        if helper_generation.value != helper_job:
+            raise SearchAborted
+
+def helper_main(worker_id, tt_name, size, syzygy_path, jobs, generation):
+    global helper_generation, helper_job
+    helper_generation = generation
+    tt_attach(tt_name, size)
+    open_syzygy(syzygy_path)
+    rng = random.Random(worker_id)
+    board = EvalBoard()
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        helper_job, fen, max_depth = job
+        board.set_fen(fen)
+        moves = list(board.legal_moves)
+        try:
+            # odd helpers run one ply ahead of the main thread
+            for d in range(1 + worker_id % 2, max_depth + 1):
+                rng.shuffle(moves)
+                for mv in moves:
+                    if generation.value != helper_job:
+                        raise SearchAborted
+                    board.push(mv)
+                    negamax(board, d-1, -INFINITY, INFINITY, 1)
+                    board.pop()
+        except SearchAborted:
+            pass  # board is left mid-line; set_fen on the next job resets it
+    open_syzygy("")
+    tt_release(unlink=False)
+
+def smp_stop():
+    """Shut down all helper processes."""
+    global helpers, helper_queues
+    for jobs in helper_queues:
+        jobs.put(None)
+    if search_generation is not None:
+        search_generation.value += 1
+    for helper in helpers:
+        helper.join(timeout=1)
+        if helper.is_alive():
+            helper.terminate()
+    helpers = []
+    helper_queues = []
+
+def smp_start(threads):
+    """(Re)start threads - 1 helper processes attached to the current table."""
+    global search_generation
+    smp_stop()
+    search_generation = multiprocessing.RawValue("i", 0)
+    for worker_id in range(threads - 1):
+        jobs = multiprocessing.Queue()
+        helper = multiprocessing.Process(target=helper_main, daemon=True,
+                                         args=(worker_id, tt_shm.name, tt_size, tablebase_path, jobs, search_generation))
+        helper.start()
+        helpers.append(helper)
+        helper_queues.append(jobs)
+
+def smp_go(board: EvalBoard, max_depth):
+    if not helpers:
+        return
+    search_generation.value += 1
+    job = (search_generation.value, board.fen(), max_depth)
+    for jobs in helper_queues:
+        jobs.put(job)
+
+def smp_halt():
+    if helpers:
+        search_generation.value += 1
+
 # ---- UCI loop & thread ----
 engine_options = {}
+threads = 1
 
-board = chess.Board()
+board = EvalBoard()
 think_thread = None
 
 def think_thread_fn(search_args):
     global board, stop_search, best_move_global
     stop_search = False
     best_move_global = None
-    depth = search_args.get("depth", 4)
+    depth = min(search_args.get("depth", 4), MAX_PLY - 1)
     movetime = search_args.get("movetime", None)
+    smp_go(board, depth)
     best = search_root(board, depth, time_limit=(movetime/1000.0 if movetime else None))
+    smp_halt()
     if best is None:
         # fallback random legal move
         moves = list(board.legal_moves)
@@ -176,7 +557,8 @@ def think_thread_fn(search_args):
     sys.stdout.flush()
 
 def uci_loop():
-    global board, think_thread, stop_search
+    global board, think_thread, stop_search, threads
+    tt_resize(DEFAULT_HASH_MB)
     while True:
         try:
             line = sys.stdin.readline()
@@ -193,6 +575,9 @@ def uci_loop():
             engine_desc = getEngineDescriptor()
             print(f"id name {engine_desc.name}")
             print(f"id author {engine_desc.autor}")
+            print(f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max 4096")
+            print("option name Threads type spin default 1 min 1 max 64")
+            print("option name SyzygyPath type string default <empty>")
             print("uciok")
             sys.stdout.flush()
 
@@ -212,12 +597,31 @@ def uci_loop():
                 name = " ".join(parts[name_idx:val_idx-1])
                 value = " ".join(parts[val_idx:])
                 engine_options[name] = value
+                if name == "Hash":
+                    had_helpers = bool(helpers)
+                    smp_stop()  # helpers must detach before the old table is unlinked
+                    if not tt_resize(max(1, int(value))):
+                        print(f"info string Hash {value} MB could not be allocated, keeping {tt_size * TT_BUCKET_BYTES >> 20} MB")
+                        sys.stdout.flush()
+                    if had_helpers:
+                        smp_start(threads)
+                elif name == "Threads":
+                    threads = max(1, int(value))
+                elif name == "SyzygyPath":
+                    open_syzygy(value)
+                    if helpers:
+                        smp_start(threads)
             except ValueError:
                 pass
 
         elif line.startswith("ucinewgame"):
             # reset internal state if needed
-            transposition_table.clear()
+            smp_start(threads)
+            tt_clear()
+            for killer_moves in killers:
+                killer_moves[0] = killer_moves[1] = None
+            for row in history:
+                row[:] = [0] * 64
             board.reset()
 
         elif line.startswith("position"):
@@ -258,6 +662,8 @@ def uci_loop():
                 # if already thinking, ignore or stop and restart; we stop then restart
                 stop_search = True
                 think_thread.join()
+            if len(helpers) != threads - 1:
+                smp_start(threads)
             think_thread = threading.Thread(target=think_thread_fn, args=(args,))
             think_thread.start()
 
@@ -277,5 +683,14 @@ def uci_loop():
             # other commands ignored for now
             pass
 
+    # stdin closed or quit: let a running search finish before freeing its table
+    stop_search = True
+    if think_thread:
+        think_thread.join()
+    smp_stop()
+    tt_release()
+    open_syzygy("")
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # helpers in the pyinstaller build
     uci_loop()